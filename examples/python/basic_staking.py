@@ -5,41 +5,447 @@ Basic native SOL staking using the Phase API
 """
 
 import os
-import json
-import base64
+import re
+import logging
+import random
 import asyncio
-from typing import Optional, Dict, Any
+import functools
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Optional, Dict, Any, List, Tuple, Type, cast
 
-import aiohttp
-from solana.rpc.async_api import AsyncClient
-from solana.rpc.commitment import Confirmed
-from solana.keypair import Keypair
-from solana.transaction import Transaction
-from solana.publickey import PublicKey
+import httpx
+import msgspec
+import orjson
+import pybase64
+from solders.keypair import Keypair
+from solders.message import to_bytes_versioned
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+try:
+    # libuv-backed event loop; not available on Windows
+    import uvloop  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    uvloop = None  # type: ignore[assignment, unused-ignore]
+
+logger = logging.getLogger(__name__)
+
+# Size of a native stake account, used for the rent-exempt minimum lookup
+STAKE_ACCOUNT_SIZE = 200
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# Phase's default rake fee, in basis points of the stake amount
+RAKE_FEE_BASIS_POINTS = 10
+
+# Headroom for the network transaction fee
+NETWORK_FEE_MARGIN_LAMPORTS = 1_000_000
+
+# Ed25519 keypair: 32-byte secret followed by the 32-byte public key
+AGENT_SECRET_SIZE = 64
+
+# Byte patterns for the /health fast path, avoiding a full JSON parse
+HEALTHY_MARKER = b'"status":"healthy"'
+LATENCY_PATTERN = re.compile(rb'"latency":\s*(\d+)')
+
+# Retry policy for submitting signed transactions
+SEND_MAX_ATTEMPTS = 5
+SEND_BACKOFF_SECONDS = 0.1
+SEND_JITTER_SECONDS = 0.05
+
+# The API already builds and validates the transaction, so skip the RPC node's
+# preflight simulation when submitting it. Without preflight an expired
+# blockhash is not reported on send, so confirmation watches the block height.
+SEND_CONFIG = {
+    "encoding": "base64",
+    "skipPreflight": True,
+    "preflightCommitment": "confirmed",
+}
+
+
+# A blockhash can be used for 150 blocks. Its expiry is bounded from the first
+# block height seen after sending, plus a margin for the API possibly reading
+# the blockhash at a different commitment than this client
+BLOCKHASH_VALID_BLOCKS = 150
+BLOCKHASH_EXPIRY_MARGIN = 10
+
+# getSignatureStatuses accepts at most this many signatures per call
+MAX_SIGNATURES_PER_STATUS_CALL = 256
+
+# Longest wait between confirmation polls while the RPC keeps failing
+POLL_BACKOFF_MAX_SECONDS = 8.0
+
+
+class RPCError(Exception):
+    """Error returned by the Solana JSON-RPC endpoint"""
+
+
+class TransactionFailedError(Exception):
+    """A submitted transaction was processed but failed"""
+
+
+class BlockhashExpiredError(RPCError):
+    """The transaction's blockhash expired before it could land"""
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed RPC request is worth retrying as-is"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class StakeFees(msgspec.Struct):
+    """Fees charged for a stake transaction, in lamports"""
+    transactionFee: int
+    rakeFee: int
+
+
+class StakeMetadata(msgspec.Struct):
+    """Details of the stake described by a built transaction"""
+    stakeAccount: str
+    validator: str
+    estimatedApy: float
+    fees: StakeFees
+
+
+class SerializedTransaction(msgspec.Struct):
+    """Base64 encoded unsigned transaction"""
+    serialized: str
+
+
+class StakeTransactionData(msgspec.Struct):
+    """Transaction data returned by /stake/build"""
+    transaction: SerializedTransaction
+    metadata: StakeMetadata
+
+
+class ApiError(msgspec.Struct):
+    """Error details returned by the API"""
+    message: str = "Unknown API error"
+
+
+class StakeBuildResponse(msgspec.Struct):
+    """Response envelope for /stake/build"""
+    data: Optional[StakeTransactionData] = None
+    error: Optional[ApiError] = None
+
+
+# Decodes /stake/build bodies straight into typed structs in a single pass
+STAKE_BUILD_DECODER = msgspec.json.Decoder(StakeBuildResponse)
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Example configuration, read from the environment"""
+    # Secrets are kept out of repr so the config can be logged safely
+    api_key: str = field(repr=False)
+    rpc_url: str
+    agent_secret: bytes = field(repr=False)
+    
+    @classmethod
+    def load(cls) -> "Config":
+        """Read and validate the environment variables, decoding the agent key"""
+        api_key = os.getenv("PHASE_API_KEY")
+        agent_private_key = os.getenv("AGENT_PRIVATE_KEY")  # Base64 encoded
+        
+        if not api_key or not agent_private_key:
+            raise RuntimeError("Please set PHASE_API_KEY and AGENT_PRIVATE_KEY environment variables")
+        
+        agent_secret = pybase64.b64decode(agent_private_key, validate=False)
+        if len(agent_secret) != AGENT_SECRET_SIZE:
+            raise RuntimeError(
+                f"AGENT_PRIVATE_KEY must decode to a {AGENT_SECRET_SIZE}-byte keypair (got {len(agent_secret)} bytes)"
+            )
+        
+        return cls(
+            api_key=api_key,
+            rpc_url=os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"),
+            agent_secret=agent_secret,
+        )
+
+
+@functools.cache
+def get_config() -> Config:
+    """Return the environment configuration, loading it on first use"""
+    return Config.load()
+
+
+def _sign_transaction(transaction: VersionedTransaction, signer: Keypair) -> VersionedTransaction:
+    """Fill the signer's signature slot, keeping any other signatures in place"""
+    message = transaction.message
+    signer_index = list(message.account_keys).index(signer.pubkey())
+    signatures = list(transaction.signatures)
+    signatures[signer_index] = signer.sign_message(to_bytes_versioned(message))
+    return VersionedTransaction.populate(message, signatures)
+
+
+def _load_signed_transaction(transaction_data: StakeTransactionData, signer: Keypair) -> VersionedTransaction:
+    """Decode an API-built transaction and sign it with the agent's key"""
+    serialized_tx = transaction_data.transaction.serialized
+    transaction_bytes = pybase64.b64decode(serialized_tx, validate=False)
+    return _sign_transaction(VersionedTransaction.from_bytes(transaction_bytes), signer)
 
 
 class PhaseStakingClient:
     """Python client for Phase Agent Staking API"""
     
-    def __init__(self, api_key: str, base_url: str = "https://staking-api.phase.com"):
-        self.api_key = api_key
-        self.base_url = base_url.rstrip('/')
-        self.session = None
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://staking-api.phase.com",
+        rpc_url: str = "https://api.mainnet-beta.solana.com"
+    ) -> None:
+        self.api_key: str = api_key
+        self.base_url: str = base_url.rstrip('/')
+        self.rpc_url: str = rpc_url
+        self.session: Optional[httpx.AsyncClient] = None
+        
+        # Static per-client request data, built once instead of on every call
+        self._headers: Dict[str, str] = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+        }
+        self._rpc_headers: Dict[str, str] = {"Content-Type": "application/json"}
+        self._stake_url: str = f"{self.base_url}/stake/build"
+        self._health_url: str = f"{self.base_url}/health"
     
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+    async def __aenter__(self) -> "PhaseStakingClient":
+        # HTTP/2 lets concurrent requests multiplex over a single connection.
+        # Authorization is sent per request so it never reaches the RPC host.
+        self.session = httpx.AsyncClient(
+            http2=True,
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=256,
+                max_keepalive_connections=64,
+                keepalive_expiry=75.0,
+            ),
+            # Bound connect and read so a slow RPC node cannot stall the caller
+            timeout=httpx.Timeout(None, connect=5.0, read=30.0),
+        )
         return self
     
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType]
+    ) -> None:
         if self.session:
-            await self.session.close()
+            await self.session.aclose()
+    
+    async def _rpc(self, method: str, params: List[Any]) -> Any:
+        """
+        Send a single Solana JSON-RPC call over the shared session
+        
+        Args:
+            method: RPC method name
+            params: RPC method parameters
+            
+        Returns:
+            The call's result
+        """
+        if not self.session:
+            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+        
+        request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        response = await self.session.post(self.rpc_url, content=orjson.dumps(request), headers=self._rpc_headers)
+        response.raise_for_status()
+        reply = orjson.loads(response.content)
+        
+        if "error" in reply:
+            raise RPCError(f"RPC Error ({method}): {reply['error'].get('message', 'Unknown RPC error')}")
+        
+        return reply["result"]
+    
+    async def send_transaction(self, transaction: VersionedTransaction) -> str:
+        """
+        Submit a signed transaction to the Solana RPC
+        
+        Transport errors, HTTP 429 and 5xx responses are retried with
+        exponential backoff and jitter; any other error is raised at once.
+        
+        Args:
+            transaction: Fully signed transaction
+            
+        Returns:
+            Transaction signature
+            
+        Raises:
+            BlockhashExpiredError: The transaction must be rebuilt
+        """
+        encoded = pybase64.b64encode(bytes(transaction)).decode()
+        attempt = 0
+        
+        while True:
+            try:
+                return cast(str, await self._rpc("sendTransaction", [encoded, SEND_CONFIG]))
+            except (RPCError, httpx.HTTPError) as error:
+                if "blockhash not found" in str(error).lower():
+                    raise BlockhashExpiredError(str(error)) from error
+                
+                attempt += 1
+                if attempt >= SEND_MAX_ATTEMPTS or not _is_transient(error):
+                    raise
+                
+                await asyncio.sleep(
+                    SEND_BACKOFF_SECONDS * 2 ** (attempt - 1) + random.uniform(0, SEND_JITTER_SECONDS)
+                )
+    
+    async def _rpc_batch(self, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """
+        Send several Solana JSON-RPC calls in a single batch request
+        
+        Args:
+            calls: (method, params) pairs to execute
+            
+        Returns:
+            Results in the same order as calls
+        """
+        if not self.session:
+            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+        
+        batch = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        response = await self.session.post(self.rpc_url, content=orjson.dumps(batch), headers=self._rpc_headers)
+        response.raise_for_status()
+        replies = orjson.loads(response.content)
+        
+        # A rejected or rate-limited batch is answered with a single error object
+        if not isinstance(replies, list):
+            error = replies.get("error") if isinstance(replies, dict) else None
+            message = error.get("message", "Unknown RPC error") if isinstance(error, dict) else "Unexpected batch reply"
+            raise RPCError(f"RPC Error (batch): {message}")
+        
+        # Batch responses may arrive in any order, match them back by id
+        by_id = {reply.get("id"): reply for reply in replies}
+        results: List[Any] = []
+        for i, (method, _) in enumerate(calls):
+            reply = by_id.get(i)
+            if reply is None:
+                raise RPCError(f"RPC Error: no response for {method}")
+            if "error" in reply:
+                raise RPCError(f"RPC Error ({method}): {reply['error'].get('message', 'Unknown RPC error')}")
+            results.append(reply["result"])
+        
+        return results
+    
+    async def get_account_snapshot(self, agent_wallet: Pubkey) -> Dict[str, Any]:
+        """
+        Fetch the pre-stake chain state for an agent in one RPC round trip
+        
+        Args:
+            agent_wallet: Agent's Solana wallet public key
+            
+        Returns:
+            Balance and stake account rent-exempt minimum, in lamports
+        """
+        balance, rent_exempt = await self._rpc_batch([
+            ("getBalance", [str(agent_wallet), {"commitment": "confirmed"}]),
+            ("getMinimumBalanceForRentExemption", [STAKE_ACCOUNT_SIZE]),
+        ])
+        
+        return {
+            "balance": balance["value"],
+            "rent_exempt_minimum": rent_exempt,
+        }
+    
+    async def confirm_transactions(
+        self,
+        signatures: List[str],
+        timeout: float = 120.0,
+        poll_interval: float = 0.5
+    ) -> List[Optional[Exception]]:
+        """
+        Wait until all signatures reach confirmed commitment or can no longer land
+        
+        Polls getSignatureStatuses for every outstanding signature, split into
+        calls of at most 256 signatures, together with getBlockHeight in a
+        single batch request. A transaction still
+        unconfirmed once the block height passes its blockhash's expiry is
+        reported as BlockhashExpiredError so the caller can rebuild it.
+        
+        A failed poll says nothing about the transactions, so transient
+        errors and rejected or malformed batch replies are retried with
+        backoff until the timeout instead of failing every signature.
+        
+        Args:
+            signatures: Transaction signatures to confirm, all already sent
+            timeout: Maximum seconds to wait before giving up on the rest
+            poll_interval: Seconds between status polls
+            
+        Returns:
+            For each signature in order, None if confirmed or the error it hit
+        """
+        outcomes: Dict[str, Optional[Exception]] = {}
+        pending = list(signatures)
+        expires_after: Optional[int] = None
+        failed_polls = 0
+        deadline = asyncio.get_running_loop().time() + timeout
+        
+        while pending:
+            chunks = [
+                pending[i:i + MAX_SIGNATURES_PER_STATUS_CALL]
+                for i in range(0, len(pending), MAX_SIGNATURES_PER_STATUS_CALL)
+            ]
+            try:
+                *status_results, block_height = await self._rpc_batch([
+                    *(("getSignatureStatuses", [chunk, {"searchTransactionHistory": False}]) for chunk in chunks),
+                    ("getBlockHeight", [{"commitment": "confirmed"}]),
+                ])
+                statuses = [status for result in status_results for status in result["value"]]
+            except (RPCError, httpx.HTTPError, ValueError) as error:
+                if isinstance(error, httpx.HTTPError) and not _is_transient(error):
+                    raise
+                
+                failed_polls += 1
+                if asyncio.get_running_loop().time() >= deadline:
+                    for signature in pending:
+                        outcomes[signature] = TimeoutError(f"Timed out confirming transaction {signature}")
+                    break
+                await asyncio.sleep(min(poll_interval * 2 ** failed_polls, POLL_BACKOFF_MAX_SECONDS))
+                continue
+            failed_polls = 0
+            
+            # Every transaction was built before this first height reading, so
+            # none of their blockhashes can outlive this bound
+            if expires_after is None:
+                expires_after = block_height + BLOCKHASH_VALID_BLOCKS + BLOCKHASH_EXPIRY_MARGIN
+            
+            still_pending: List[str] = []
+            for signature, status in zip(pending, statuses):
+                if status and status.get("err"):
+                    outcomes[signature] = TransactionFailedError(f"Transaction {signature} failed: {status['err']}")
+                elif status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                    outcomes[signature] = None
+                elif status is None and block_height > expires_after:
+                    # Only an unseen transaction has expired; a processed one
+                    # is already in a block and stays pending until confirmed
+                    outcomes[signature] = BlockhashExpiredError(f"Transaction {signature} expired before landing")
+                else:
+                    still_pending.append(signature)
+            pending = still_pending
+            
+            if pending:
+                if asyncio.get_running_loop().time() >= deadline:
+                    for signature in pending:
+                        outcomes[signature] = TimeoutError(f"Timed out confirming transaction {signature}")
+                    break
+                await asyncio.sleep(poll_interval)
+        
+        return [outcomes[signature] for signature in signatures]
     
     async def build_stake_transaction(
         self, 
-        agent_wallet: PublicKey, 
+        agent_wallet: Pubkey, 
         stake_amount: float, 
-        validator_vote_account: Optional[PublicKey] = None
-    ) -> Dict[str, Any]:
+        validator_vote_account: Optional[Pubkey] = None
+    ) -> StakeTransactionData:
         """
         Build an unsigned staking transaction
         
@@ -54,9 +460,7 @@ class PhaseStakingClient:
         if not self.session:
             raise RuntimeError("Client not initialized. Use 'async with' context manager.")
         
-        endpoint = f"{self.base_url}/stake/build"
-        
-        payload = {
+        payload: Dict[str, Any] = {
             "agentWallet": str(agent_wallet),
             "stakeAmount": stake_amount,
         }
@@ -64,32 +468,137 @@ class PhaseStakingClient:
         if validator_vote_account:
             payload["validatorVoteAccount"] = str(validator_vote_account)
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
+        response = await self.session.post(self._stake_url, content=orjson.dumps(payload), headers=self._headers)
+        
+        try:
+            result = STAKE_BUILD_DECODER.decode(response.content)
+        except msgspec.DecodeError:
+            if response.is_success:
+                raise
+            result = StakeBuildResponse()
+        
+        if not response.is_success or result.data is None:
+            error_msg = result.error.message if result.error else "Unknown API error"
+            raise Exception(f"API Error: {error_msg}")
+        
+        return result.data
+    
+    async def _send_stake(
+        self,
+        agent_keypair: Keypair,
+        stake_amount: float,
+        validator_vote_account: Optional[Pubkey]
+    ) -> Tuple[StakeTransactionData, str]:
+        """Build, sign and send one stake transaction, returning it with its signature"""
+        logger.info("🚀 Building stake transaction for %s SOL...", stake_amount)
+        
+        # Step 1: Build the unsigned transaction
+        transaction_data = await self.build_stake_transaction(
+            agent_keypair.pubkey(),
+            stake_amount,
+            validator_vote_account
+        )
+        
+        if logger.isEnabledFor(logging.INFO):
+            metadata = transaction_data.metadata
+            logger.info("✅ Transaction built successfully")
+            logger.info("📝 Stake Account: %s", metadata.stakeAccount)
+            logger.info("🎯 Validator: %s", metadata.validator)
+            logger.info("📈 Estimated APY: %s%%", metadata.estimatedApy)
+            logger.info("💰 Total Fees: %s lamports", metadata.fees.transactionFee + metadata.fees.rakeFee)
+        
+        # Step 2 & 3: Reconstruct and sign the transaction
+        transaction = _load_signed_transaction(transaction_data, agent_keypair)
+        
+        logger.debug("✍️ Transaction signed, sending to network...")
+        
+        # Step 4: Send the transaction
+        signature = await self.send_transaction(transaction)
+        
+        return transaction_data, signature
+    
+    async def _stake_all(
+        self,
+        items: List[Tuple[Keypair, float, Optional[Pubkey]]],
+        concurrency: int
+    ) -> List[Any]:
+        """
+        Send every stake, then confirm all of them with one shared polling loop
+        
+        Transactions whose blockhash expired before landing are rebuilt and
+        resent once.
         
-        async with self.session.post(endpoint, json=payload, headers=headers) as response:
-            result = await response.json()
+        Args:
+            items: (agent keypair, stake amount, optional validator) per stake
+            concurrency: Maximum number of builds and sends in flight at once
+            
+        Returns:
+            Staking result or raised exception for each item, in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _send_one(index: int) -> Tuple[StakeTransactionData, str]:
+            async with semaphore:
+                return await self._send_stake(*items[index])
+        
+        results: List[Any] = [None] * len(items)
+        to_send = list(range(len(items)))
+        rebuilt = False
+        
+        while to_send:
+            # Steps 1-4: Build, sign and send each transaction
+            sent = await asyncio.gather(*(_send_one(i) for i in to_send), return_exceptions=True)
+            
+            outcomes: Dict[int, Any] = {}
+            pending: Dict[int, Tuple[StakeTransactionData, str]] = {}
+            for index, sent_item in zip(to_send, sent):
+                if isinstance(sent_item, BaseException):
+                    outcomes[index] = sent_item
+                else:
+                    pending[index] = sent_item
             
-            if not response.ok:
-                error_msg = result.get("error", {}).get("message", "Unknown API error")
-                raise Exception(f"API Error: {error_msg}")
+            # Step 5: Confirm every sent transaction together
+            if pending:
+                try:
+                    errors = await self.confirm_transactions([signature for _, signature in pending.values()])
+                except Exception as error:
+                    errors = [error] * len(pending)
+                outcomes.update(zip(pending, errors))
             
-            return result["data"]
+            to_send = []
+            for index, outcome in outcomes.items():
+                if isinstance(outcome, BlockhashExpiredError) and not rebuilt:
+                    # The transaction can no longer land, so it is safe to rebuild once
+                    logger.warning("⌛ Blockhash expired before the transaction landed, rebuilding...")
+                    to_send.append(index)
+                elif outcome is not None:
+                    logger.error("❌ Staking failed: %s", outcome)
+                    results[index] = outcome
+                else:
+                    transaction_data, signature = pending[index]
+                    logger.info("🎉 Staking successful!")
+                    logger.info("🔗 Transaction: https://explorer.solana.com/tx/%s", signature)
+                    logger.info("📊 Stake Account: https://explorer.solana.com/address/%s", transaction_data.metadata.stakeAccount)
+                    results[index] = {
+                        "signature": signature,
+                        "stake_account": transaction_data.metadata.stakeAccount,
+                        "validator": transaction_data.metadata.validator,
+                        "estimated_apy": transaction_data.metadata.estimatedApy,
+                    }
+            rebuilt = True
+        
+        return results
     
     async def execute_staking(
         self,
-        solana_client: AsyncClient,
         agent_keypair: Keypair,
         stake_amount: float,
-        validator_vote_account: Optional[PublicKey] = None
+        validator_vote_account: Optional[Pubkey] = None
     ) -> Dict[str, Any]:
         """
         Execute complete staking workflow
         
         Args:
-            solana_client: Async Solana RPC client
             agent_keypair: Agent's keypair for signing
             stake_amount: Amount of SOL to stake
             validator_vote_account: Optional validator selection
@@ -97,146 +606,159 @@ class PhaseStakingClient:
         Returns:
             Staking result with transaction signature and metadata
         """
-        print(f"🚀 Building stake transaction for {stake_amount} SOL...")
+        (result,) = await self._stake_all([(agent_keypair, stake_amount, validator_vote_account)], concurrency=1)
         
-        try:
-            # Step 1: Build the unsigned transaction
-            transaction_data = await self.build_stake_transaction(
-                agent_keypair.public_key,
-                stake_amount,
-                validator_vote_account
-            )
-            
-            print("✅ Transaction built successfully")
-            print(f"📝 Stake Account: {transaction_data['metadata']['stakeAccount']}")
-            print(f"🎯 Validator: {transaction_data['metadata']['validator']}")
-            print(f"📈 Estimated APY: {transaction_data['metadata']['estimatedApy']}%")
-            
-            fees = transaction_data['metadata']['fees']
-            total_fees = fees['transactionFee'] + fees['rakeFee']
-            print(f"💰 Total Fees: {total_fees} lamports")
-            
-            # Step 2: Reconstruct the transaction
-            serialized_tx = transaction_data['transaction']['serialized']
-            transaction_bytes = base64.b64decode(serialized_tx)
-            transaction = Transaction.deserialize(transaction_bytes)
-            
-            # Step 3: Sign the transaction
-            transaction.sign(agent_keypair)
-            
-            print("✍️ Transaction signed, sending to network...")
-            
-            # Step 4: Send the transaction
-            response = await solana_client.send_transaction(transaction)
-            signature = response['result']
-            
-            # Step 5: Confirm the transaction
-            await solana_client.confirm_transaction(signature)
-            
-            print("🎉 Staking successful!")
-            print(f"🔗 Transaction: https://explorer.solana.com/tx/{signature}")
-            print(f"📊 Stake Account: https://explorer.solana.com/address/{transaction_data['metadata']['stakeAccount']}")
-            
-            return {
-                "signature": signature,
-                "stake_account": transaction_data['metadata']['stakeAccount'],
-                "validator": transaction_data['metadata']['validator'],
-                "estimated_apy": transaction_data['metadata']['estimatedApy'],
-            }
+        if isinstance(result, BaseException):
+            raise result
+        
+        return cast(Dict[str, Any], result)
+    
+    async def execute_staking_many(
+        self,
+        items: List[Tuple[Keypair, float, Optional[Pubkey]]],
+        *,
+        concurrency: int = 16
+    ) -> List[Any]:
+        """
+        Execute staking for many agents in parallel
+        
+        Builds and sends are fanned out with bounded concurrency, then all
+        signatures are confirmed with a single batched polling loop.
+        
+        Args:
+            items: (agent keypair, stake amount, optional validator) per stake
+            concurrency: Maximum number of builds and sends in flight at once
             
-        except Exception as error:
-            print(f"❌ Staking failed: {error}")
-            raise
+        Returns:
+            Staking result or raised exception for each item, in input order
+        """
+        return await self._stake_all(items, concurrency)
     
     async def check_health(self) -> bool:
         """Check API health status"""
         if not self.session:
             raise RuntimeError("Client not initialized. Use 'async with' context manager.")
         
-        async with self.session.get(f"{self.base_url}/health") as response:
-            result = await response.json()
-            
-            if response.ok and result.get("success") and result.get("data", {}).get("status") == "healthy":
-                latency = result["data"]["checks"]["solana"]["latency"]
-                print(f"✅ Phase Staking API is healthy (latency: {latency}ms)")
-                return True
-            else:
-                print("❌ Phase Staking API is unhealthy")
-                return False
+        response = await self.session.get(self._health_url)
+        raw = response.content
+        
+        # Fast path: the API answers 200 with a "healthy" status, and only the
+        # Solana latency is needed from the body
+        if response.is_success and HEALTHY_MARKER in raw:
+            match = LATENCY_PATTERN.search(raw)
+            latency = int(match.group(1)) if match else -1
+            logger.info("✅ Phase Staking API is healthy (latency: %sms)", latency)
+            return True
+        
+        # Slow path: parse the full body to surface the failure reason
+        try:
+            result = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            result = {}
+        solana_check = result.get("data", {}).get("checks", {}).get("solana", {})
+        reason = solana_check.get("error") or result.get("error", {}).get("message")
+        logger.warning("❌ Phase Staking API is unhealthy (%s)", reason or "no reason given")
+        return False
 
 
-async def main():
+async def main() -> None:
     """Example usage of the Phase Staking Client"""
     
-    # Configuration from environment
-    api_key = os.getenv("PHASE_API_KEY")
-    rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
-    agent_private_key = os.getenv("AGENT_PRIVATE_KEY")  # Base58 encoded
+    log_level = os.getenv("PHASE_LOG_LEVEL", "WARNING").upper()
+    level_names = logging.getLevelNamesMapping()
+    logging.basicConfig(level=level_names.get(log_level, logging.WARNING))
+    if log_level not in level_names:
+        logger.warning("Unknown PHASE_LOG_LEVEL %r, using WARNING", log_level)
     
-    if not api_key or not agent_private_key:
-        print("❌ Please set PHASE_API_KEY and AGENT_PRIVATE_KEY environment variables")
+    # Configuration from environment
+    try:
+        config = get_config()
+    except RuntimeError as error:
+        logger.error("❌ %s", error)
         return
     
     try:
         # Initialize clients
-        async with PhaseStakingClient(api_key) as phase_client:
-            solana_client = AsyncClient(rpc_url, commitment=Confirmed)
-            
-            # Load agent keypair
+        async with PhaseStakingClient(config.api_key, rpc_url=config.rpc_url) as phase_client:
+            # Load agent keypair once; it is reused to sign every transaction
             # Note: In production, use secure key management
-            agent_keypair = Keypair.from_secret_key(base64.b64decode(agent_private_key))
+            agent_keypair = Keypair.from_bytes(config.agent_secret)
             
-            # Check API health
-            await phase_client.check_health()
+            # Check API health and agent balance concurrently
+            health_ok, snapshot = await asyncio.gather(
+                phase_client.check_health(),
+                phase_client.get_account_snapshot(agent_keypair.pubkey()),
+            )
             
-            # Check agent balance
-            balance_response = await solana_client.get_balance(agent_keypair.public_key)
-            balance_lamports = balance_response['result']['value']
-            balance_sol = balance_lamports / 1_000_000_000
+            if not health_ok:
+                return
             
-            print(f"💰 Agent Balance: {balance_sol} SOL")
+            stake_amount = 1.0  # Stake 1 SOL
+            stake_lamports = int(stake_amount * LAMPORTS_PER_SOL)
+            balance_sol = snapshot['balance'] / LAMPORTS_PER_SOL
             
-            if balance_sol < 1.1:  # Need at least 1 SOL + fees
-                print(f"❌ Insufficient balance. Need at least 1.1 SOL (have {balance_sol} SOL)")
+            logger.info("💰 Agent Balance: %s SOL", balance_sol)
+            
+            # The stake account is funded with the stake plus its rent-exempt
+            # reserve, and the rake and network fees come on top
+            required_lamports = (
+                stake_lamports
+                + snapshot['rent_exempt_minimum']
+                + stake_lamports * RAKE_FEE_BASIS_POINTS // 10_000
+                + NETWORK_FEE_MARGIN_LAMPORTS
+            )
+            if snapshot['balance'] < required_lamports:
+                logger.error(
+                    "❌ Insufficient balance. Need at least %s SOL (have %s SOL)",
+                    required_lamports / LAMPORTS_PER_SOL,
+                    balance_sol
+                )
                 return
             
             # Execute staking
-            stake_amount = 1.0  # Stake 1 SOL
             result = await phase_client.execute_staking(
-                solana_client,
                 agent_keypair,
                 stake_amount
                 # Optional: specify validator
-                # PublicKey("8p1VGE8YZYfYAJaJ9UfZLFjR5jhJhzjzKvVv5HYjLXhm")
+                # Pubkey.from_string("8p1VGE8YZYfYAJaJ9UfZLFjR5jhJhzjzKvVv5HYjLXhm")
             )
             
             print("🏁 Staking Complete:")
-            print(json.dumps(result, indent=2))
+            print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
             
     except Exception as error:
-        print(f"❌ Error: {error}")
+        logger.error("❌ Error: %s", error)
         raise
-    finally:
-        await solana_client.close()
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
 
 """
 Usage Instructions:
 
-1. Install dependencies:
-   pip install aiohttp solana
+1. Install dependencies (Python 3.11+):
+   pip install "httpx[http2]" msgspec orjson pybase64 solders
+   pip install uvloop  # Optional, faster event loop on Linux/macOS
 
 2. Set environment variables:
    export PHASE_API_KEY="your-api-key-here"
    export AGENT_PRIVATE_KEY="base64-encoded-private-key"
    export SOLANA_RPC_URL="https://api.mainnet-beta.solana.com"  # Optional
+   export PHASE_LOG_LEVEL="INFO"  # Optional, show progress output (default WARNING)
 
 3. Run:
    python basic_staking.py
 
+4. Run the tests (mock Phase API and Solana RPC, no network needed):
+   python -m unittest test_basic_staking
+
+5. Optional: compile the module for high call rates (fully type-annotated):
+   pip install mypy
+   mypyc basic_staking.py
+
 Safety Notes:
 - Never hardcode private keys in source code
 - Use environment variables or secure key management systems
@@ -0,0 +1,219 @@
+"""
+Tests for the Phase Staking Client, run against an in-memory Phase API
+and Solana RPC served through httpx.MockTransport
+
+Run with: python -m unittest test_basic_staking
+"""
+
+import unittest
+from collections import Counter
+from typing import Any, Dict, List, Set, Union
+from unittest import mock
+
+import httpx
+import orjson
+import pybase64
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.signature import Signature
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+
+from basic_staking import BlockhashExpiredError, PhaseStakingClient, logger
+
+
+class MockChain:
+    """Serves /stake/build and the Solana JSON-RPC methods the client uses"""
+
+    def __init__(self, blocks_per_poll: int = 1) -> None:
+        self.keypairs: Dict[str, Keypair] = {}
+        self.block_height = 1000
+        self.blocks_per_poll = blocks_per_poll
+        self.sent: List[str] = []
+        self.calls: Counter[str] = Counter()
+        self.polls = 0
+        # Indexes (in send order) of transactions that never land
+        self.dropped: Set[int] = set()
+        # Number of polls that report landed transactions as only processed
+        self.processed_polls = 0
+        # Responses returned instead of serving a request, consumed in order
+        self.send_failures: List[httpx.Response] = []
+        self.poll_failures: List[Union[httpx.Response, Exception]] = []
+
+    def add_agent(self) -> Keypair:
+        keypair = Keypair()
+        self.keypairs[str(keypair.pubkey())] = keypair
+        return keypair
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/stake/build":
+            return self._build(orjson.loads(request.content))
+
+        body = orjson.loads(request.content)
+        calls = [body] if isinstance(body, dict) else body
+        methods = {call["method"] for call in calls}
+
+        if "sendTransaction" in methods and self.send_failures:
+            self.calls["sendTransaction"] += 1
+            return self.send_failures.pop(0)
+        if "getSignatureStatuses" in methods and self.poll_failures:
+            failure = self.poll_failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        if "getSignatureStatuses" in methods:
+            self.polls += 1
+            self.block_height += self.blocks_per_poll
+
+        replies = [self._rpc(call) for call in calls]
+        return httpx.Response(200, content=orjson.dumps(replies[0] if isinstance(body, dict) else replies))
+
+    def _build(self, payload: Dict[str, Any]) -> httpx.Response:
+        self.calls["build"] += 1
+        payer = self.keypairs[payload["agentWallet"]]
+        instruction = transfer(TransferParams(
+            from_pubkey=payer.pubkey(),
+            to_pubkey=Keypair().pubkey(),
+            lamports=1,
+        ))
+        message = Message.new_with_blockhash([instruction], payer.pubkey(), Hash.new_unique())
+        unsigned = VersionedTransaction.populate(message, [Signature.default()])
+
+        return httpx.Response(200, content=orjson.dumps({
+            "success": True,
+            "data": {
+                "transaction": {"serialized": pybase64.b64encode(bytes(unsigned)).decode()},
+                "metadata": {
+                    "stakeAccount": str(Keypair().pubkey()),
+                    "validator": str(Keypair().pubkey()),
+                    "estimatedApy": 7.0,
+                    "fees": {"transactionFee": 5000, "rakeFee": 1000},
+                },
+            },
+        }))
+
+    def _rpc(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        method, params = call["method"], call["params"]
+        self.calls[method] += 1
+
+        if method == "sendTransaction":
+            transaction = VersionedTransaction.from_bytes(pybase64.b64decode(params[0]))
+            signature = str(transaction.signatures[0])
+            self.sent.append(signature)
+            return {"jsonrpc": "2.0", "id": call["id"], "result": signature}
+
+        if method == "getBlockHeight":
+            return {"jsonrpc": "2.0", "id": call["id"], "result": self.block_height}
+
+        if method == "getSignatureStatuses":
+            signatures = params[0]
+            if len(signatures) > 256:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": call["id"],
+                    "error": {"code": -32602, "message": "Too many inputs provided; max 256"},
+                }
+
+            commitment = "processed" if self.polls <= self.processed_polls else "confirmed"
+            statuses = [
+                None if self.sent.index(signature) in self.dropped
+                else {"confirmationStatus": commitment, "err": None}
+                for signature in signatures
+            ]
+            return {"jsonrpc": "2.0", "id": call["id"], "result": {"value": statuses}}
+
+        return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": "Method not found"}}
+
+
+class PhaseStakingClientTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        logger.disabled = True
+        self.addCleanup(setattr, logger, "disabled", False)
+
+        self.chain = MockChain()
+        self.client = PhaseStakingClient("test-key", base_url="http://phase.test", rpc_url="http://rpc.test")
+        self.client.session = httpx.AsyncClient(transport=httpx.MockTransport(self.chain.handle))
+
+    async def asyncTearDown(self) -> None:
+        await self.client.__aexit__(None, None, None)
+
+    @mock.patch("basic_staking.SEND_BACKOFF_SECONDS", 0.0)
+    async def test_rate_limited_send_is_retried(self) -> None:
+        self.chain.send_failures = [httpx.Response(429)]
+
+        result = await self.client.execute_staking(self.chain.add_agent(), 1.0)
+
+        self.assertEqual(result["signature"], self.chain.sent[0])
+        self.assertEqual(self.chain.calls["sendTransaction"], 2)
+        self.assertEqual(self.chain.calls["build"], 1)
+
+    @mock.patch("basic_staking.SEND_BACKOFF_SECONDS", 0.0)
+    async def test_client_error_on_send_is_not_retried(self) -> None:
+        self.chain.send_failures = [httpx.Response(400)]
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.client.execute_staking(self.chain.add_agent(), 1.0)
+
+        self.assertEqual(self.chain.calls["sendTransaction"], 1)
+
+    async def test_expired_transaction_is_rebuilt_once(self) -> None:
+        self.chain.blocks_per_poll = 200
+        self.chain.dropped = {0}
+
+        result = await self.client.execute_staking(self.chain.add_agent(), 1.0)
+
+        self.assertEqual(result["signature"], self.chain.sent[1])
+        self.assertEqual(self.chain.calls["build"], 2)
+        self.assertEqual(self.chain.calls["sendTransaction"], 2)
+
+    async def test_second_expiry_is_reported(self) -> None:
+        self.chain.blocks_per_poll = 200
+        self.chain.dropped = {0, 1}
+
+        with self.assertRaises(BlockhashExpiredError):
+            await self.client.execute_staking(self.chain.add_agent(), 1.0)
+
+        self.assertEqual(self.chain.calls["build"], 2)
+
+    async def test_processed_transaction_past_expiry_is_not_rebuilt(self) -> None:
+        self.chain.blocks_per_poll = 200
+        self.chain.processed_polls = 2
+
+        result = await self.client.execute_staking(self.chain.add_agent(), 1.0)
+
+        self.assertEqual(result["signature"], self.chain.sent[0])
+        self.assertEqual(self.chain.calls["build"], 1)
+
+    async def test_bulk_staking_over_status_call_limit(self) -> None:
+        agents = [self.chain.add_agent() for _ in range(300)]
+
+        results = await self.client.execute_staking_many([(agent, 1.0, None) for agent in agents])
+
+        self.assertEqual([type(result) for result in results], [dict] * 300)
+        self.assertEqual(self.chain.calls["sendTransaction"], 300)
+        self.assertEqual(self.chain.calls["getSignatureStatuses"], 2)
+
+    @mock.patch("basic_staking.POLL_BACKOFF_MAX_SECONDS", 0.01)
+    async def test_transient_poll_errors_do_not_fail_sent_stakes(self) -> None:
+        agents = [self.chain.add_agent() for _ in range(3)]
+        self.chain.poll_failures = [
+            httpx.Response(503),
+            httpx.ReadTimeout("read timed out"),
+            httpx.Response(200, content=orjson.dumps({
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32005, "message": "Too many requests"},
+            })),
+        ]
+
+        results = await self.client.execute_staking_many([(agent, 1.0, None) for agent in agents])
+
+        self.assertEqual([type(result) for result in results], [dict] * 3)
+        self.assertEqual(self.chain.calls["build"], 3)
+        self.assertEqual(self.chain.calls["sendTransaction"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()